@@ -82,6 +82,7 @@ class DevicesTab(shared.TabData):
 
         # Recache the device list
         self.SidebarTree.parent().show()
+        self.middleman.reload_device_cache()
         self.appdata.device_list = self.middleman.get_device_list()
         unknown_device_list = self.middleman.get_unsupported_devices()
 
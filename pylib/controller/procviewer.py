@@ -150,6 +150,7 @@ class ProcessViewer():
     def _refresh_list(self):
         procmgr = procpid.ProcessManager()
         components = procmgr._get_component_pid_list()
+        self.appdata.middleman.reload_device_cache()
         device_list = self.appdata.middleman.get_device_list()
 
         tree = self.dialog.findChild(QTreeWidget, "TasksTree")
@@ -14,13 +14,26 @@ Refer to the online documentation for more details:
 https://docs.polychromatic.app/
 """
 
+import importlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 from . import procpid
 from . import common
 
-BACKEND_ID_NAMES = {
-#   "backend ID": "human readable string"
-    "openrazer": "OpenRazer"
-}
+# Modules are relative to this package and imported when needed, as the
+# backend's dependencies may not be installed.
+#   id              Backend ID
+#   name            Human readable string
+#   module          Module containing the Backend() class
+#   troubleshoot    Module containing a troubleshoot() function, or None
+BackendSpec = namedtuple("BackendSpec", ["id", "name", "module", "troubleshoot"])
+
+BACKENDS = (
+    BackendSpec(id="openrazer", name="OpenRazer", module=".backends.openrazer", troubleshoot=".troubleshoot.openrazer"),
+)
+
+BACKEND_ID_NAMES = {spec.id: spec.name for spec in BACKENDS}
 
 class Middleman(object):
     """
@@ -38,8 +51,11 @@ class Middleman(object):
         # List of initialised Backend() objects.
         self.backends = []
 
-        # List of IDs for modules that are not present.
-        self.not_installed = []
+        # Same Backend() objects, keyed by their backend ID for quick lookups.
+        self._backends_by_id = {}
+
+        # Set of IDs for modules that are not present.
+        self.not_installed = set()
 
         # Keys referencing troubleshoot() functions, if available.
         self.troubleshooters = {}
@@ -47,34 +63,72 @@ class Middleman(object):
         # Keys containing human readable strings for modules that failed to import.
         self.import_errors = {}
 
+        # Versions of each running backend, see get_versions().
+        self._versions_cache = None
+
+        # Devices from each backend's get_device_list(), see reload_device_cache().
+        self.device_cache = []
+
+        # Same device items, keyed by name, serial and form factor ID.
+        self._devices_by_name = {}
+        self._devices_by_serial = {}
+        self._devices_by_form_factor = {}
+
+        # Result of get_unsupported_devices(), cleared with the device cache.
+        self._unsupported_cache = None
+
     def init(self):
         """
         Imports the modules and initialises the backend objects.
         """
-        # -- OpenRazer
-        try:
-            from .backends import openrazer as openrazer
-            self.backends.append(openrazer.Backend(self._dbg, self._common, self._))
-        except (ImportError, ModuleNotFoundError):
-            self.not_installed.append("openrazer")
-        except Exception as e:
-            self.import_errors["openrazer"] = self._common.get_exception_as_string(e)
+        self._versions_cache = None
+
+        # Backends may wait on I/O (such as D-Bus) while initialising, so load
+        # them concurrently. Results are processed in order on this thread.
+        # With only one backend this just adds a thread hop; startup gets no
+        # faster until there are more.
+        with ThreadPoolExecutor(max_workers=len(BACKENDS)) as executor:
+            futures = {}
+            for spec in BACKENDS:
+                futures[spec.id] = executor.submit(self._load_backend_module, spec)
+
+        for backend_id, future in futures.items():
+            try:
+                self._add_backend(future.result())
+            except (ImportError, ModuleNotFoundError):
+                self.not_installed.add(backend_id)
+            except Exception as e:
+                self.import_errors[backend_id] = self._common.get_exception_as_string(e)
+
+    def _add_backend(self, backend):
+        """
+        Registers an initialised Backend() object as running.
+        """
+        self.backends.append(backend)
+        self._backends_by_id[backend.backend_id] = backend
+
+    def _load_backend_module(self, spec):
+        """
+        Imports a backend's module (from its BackendSpec) and returns its
+        initialised Backend() object. Exceptions are raised to the caller.
+        """
+        module = importlib.import_module(spec.module, __package__)
+        return module.Backend(self._dbg, self._common, self._)
 
     def init_troubleshooters(self):
         """
         Imports the modules that provide troubleshooting support.
         """
-        from .troubleshoot import openrazer as openrazer_troubleshoot
-        self.troubleshooters["openrazer"] = openrazer_troubleshoot.troubleshoot
+        for spec in BACKENDS:
+            if spec.troubleshoot:
+                module = importlib.import_module(spec.troubleshoot, __package__)
+                self.troubleshooters[spec.id] = module.troubleshoot
 
     def get_backend(self, backend_id):
         """
         Returns a specific backend. If not loaded, returns None.
         """
-        for module in self.backends:
-            if module.backend_id == backend_id:
-                return module
-        return None
+        return self._backends_by_id.get(backend_id)
 
     def get_backends(self):
         """
@@ -89,32 +143,66 @@ class Middleman(object):
         """
         Return a dictionary of versions for each running backend.
         """
-        versions = {}
+        if self._versions_cache is None:
+            self._versions_cache = {module.backend_id: module.version for module in self.backends}
+        return dict(self._versions_cache)
+
+    def reload_device_cache(self):
+        """
+        Clears the device cache and populates it with devices from each backend.
+        Call this when the list of connected devices may have changed.
+        """
+        self._unsupported_cache = None
+        self._populate_device_cache()
+
+    def _populate_device_cache(self):
+        """
+        Refills the device cache and its indexes, leaving other caches intact.
+        """
+        self._clear_device_cache()
+
         for module in self.backends:
-            versions[module.backend_id] = module.version
-        return versions
+            device_list = module.get_device_list()
+            if isinstance(device_list, list):
+                self.device_cache.extend(device_list)
+
+        for device in self.device_cache:
+            self._devices_by_name.setdefault(device["name"], device)
+            self._devices_by_serial.setdefault(device["serial"], device)
+            self._devices_by_form_factor.setdefault(device["form_factor"]["id"], []).append(device)
+
+    def _clear_device_cache(self):
+        """
+        Empties the device cache and the indexes built from it.
+        """
+        self.device_cache = []
+        self._devices_by_name = {}
+        self._devices_by_serial = {}
+        self._devices_by_form_factor = {}
+
+    def _reload_device_cache_if_empty(self):
+        """
+        Populates the device cache if there are no devices or it is a fresh run.
+        """
+        if not self.device_cache:
+            self.reload_device_cache()
 
     def get_device_list(self):
         """
         Returns a list of connected devices.
+
+        The list is cached, and does not change until reload_device_cache() is
+        called, such as when the Controller's Devices tab is opened.
         """
-        devices = []
-        for module in self.backends:
-            m_devices = module.get_device_list()
-            if type(m_devices) == list:
-                devices = devices + m_devices
-        return devices
+        self._reload_device_cache_if_empty()
+        return list(self.device_cache)
 
     def get_filtered_device_list(self, form_factor):
         """
         Returns a list of connected devices filtered by a form factor.
         """
-        new_list = []
-        devices = self.get_device_list()
-        for device in devices:
-            if device["form_factor"]["id"] == form_factor:
-                new_list.append(device)
-        return new_list
+        self._reload_device_cache_if_empty()
+        return list(self._devices_by_form_factor.get(form_factor, []))
 
     def get_device_by_name(self, name):
         """
@@ -122,11 +210,12 @@ class Middleman(object):
 
         None is returned if the device cannot be found (e.g. not connected)
         """
-        devices = self.get_device_list()
-        for device in devices:
-            if device["name"] == name:
-                return device
-        return None
+        device = self._devices_by_name.get(name)
+        if not device:
+            # Not cached, such as when connected after the cache was populated
+            self._populate_device_cache()
+            device = self._devices_by_name.get(name)
+        return device
 
     def get_device_by_serial(self, serial):
         """
@@ -134,7 +223,20 @@ class Middleman(object):
 
         None is returned if the device cannot be found (e.g. not connected)
         """
-        for module in self.backends:
+        # Don't populate the cache just for this, as listing every device costs
+        # more than asking each backend for one.
+        device_item = self._devices_by_serial.get(serial)
+
+        # Only the owning backend needs to be asked for a fresh get_device() object
+        if device_item:
+            modules = [self._backends_by_id.get(device_item["backend"])]
+        else:
+            # Not cached, such as when connected after the cache was populated
+            modules = self.backends
+
+        for module in modules:
+            if not module:
+                continue
             device = module.get_device_by_serial(serial)
             if device:
                 return device
@@ -144,12 +246,14 @@ class Middleman(object):
         """
         Returns a list of connected devices that cannot be controlled by their backend.
         """
-        devices = []
-        for module in self.backends:
-            m_devices = module.get_unsupported_devices()
-            if type(m_devices) == list:
-                devices = devices + m_devices
-        return devices
+        if self._unsupported_cache is None:
+            devices = []
+            for module in self.backends:
+                m_devices = module.get_unsupported_devices()
+                if isinstance(m_devices, list):
+                    devices.extend(m_devices)
+            self._unsupported_cache = devices
+        return list(self._unsupported_cache)
 
     def get_device(self, backend, uid):
         """
@@ -159,15 +263,15 @@ class Middleman(object):
         """
         device = None
 
-        for module in self.backends:
-            if module.backend_id == backend:
-                try:
-                    device = module.get_device(uid)
-                except Exception as e:
-                    device = common.get_exception_as_string(e)
+        module = self._backends_by_id.get(backend)
+        if module:
+            try:
+                device = module.get_device(uid)
+            except Exception as e:
+                device = common.get_exception_as_string(e)
 
         # In case of error, return immediately
-        if type(device) in [None, str]:
+        if not isinstance(device, dict):
             return device
 
         # In addition, append state data
@@ -187,7 +291,7 @@ class Middleman(object):
         devices = []
         for device_item in device_list:
             device = self.get_device(device_item["backend"], device_item["uid"])
-            if type(device) == dict:
+            if isinstance(device, dict):
                 devices.append(device)
         return devices
 
@@ -210,9 +314,9 @@ class Middleman(object):
             if state.get_preset():
                 state.clear_preset()
 
-        for module in self.backends:
-            if module.backend_id == backend:
-                return module.set_device_state(uid, zone, option_id, option_data, colour_hex)
+        module = self._backends_by_id.get(backend)
+        if module:
+            return module.set_device_state(uid, zone, option_id, option_data, colour_hex)
 
         # Refresh Controller, if it is running.
         proc_controller = procpid.ProcessManager("controller")
@@ -223,9 +327,9 @@ class Middleman(object):
         Returns a 'device' object that can be used for drawing frames to a device
         that supports individual addressable LEDs ("matrix")
         """
-        for module in self.backends:
-            if module.backend_id == backend:
-                return module.get_device_object(uid)
+        module = self._backends_by_id.get(backend)
+        if module:
+            return module.get_device_object(uid)
 
     def troubleshoot(self, backend, i18n, fn_progress_set_max, fn_progress_advance):
         """
@@ -241,11 +345,13 @@ class Middleman(object):
             None            Troubleshooter not available
             False           Troubleshooter failed
         """
-        try:
-            return self.troubleshooters[backend](i18n, fn_progress_set_max, fn_progress_advance)
-        except KeyError:
+        troubleshooter = self.troubleshooters.get(backend)
+        if not troubleshooter:
             # Troubleshooter not available for this backend
             return None
+
+        try:
+            return troubleshooter(i18n, fn_progress_set_max, fn_progress_advance)
         except Exception as e:
             # Troubleshooter crashed
             return common.get_exception_as_string(e)
@@ -254,9 +360,12 @@ class Middleman(object):
         """
         Restarts a specific backend.
         """
-        for module in self.backends:
-            if module.backend_id == backend:
-                return module.restart()
+        self._versions_cache = None
+        self._unsupported_cache = None
+        self._clear_device_cache()
+        module = self._backends_by_id.get(backend)
+        if module:
+            return module.restart()
 
     def _get_current_device_option(self, device, zone=None):
         """
@@ -270,50 +379,61 @@ class Middleman(object):
         Returns list:
         [option_id, option_data, colour_hex]
         """
-        option_id = None
-        option_data = None
-        colour_hex = []
-        colour_count = 0
+        zone_options = device["zone_options"]
         found_option = None
         param = None
 
         if zone:
-            zones = [zone]
+            found_option, param = self._find_active_effect(zone_options[zone])
         else:
             # Find an active effect in all zones, uses the last matched one.
-            zones = device["zone_options"].keys()
-
-        for zone in zones:
-            for option in device["zone_options"][zone]:
-                if not "active" in option.keys():
-                    continue
-
-                if not option["type"] == "effect":
-                    continue
-
-                if option["active"] == True:
+            for options in zone_options.values():
+                option, option_param = self._find_active_effect(options)
+                if option:
                     found_option = option
-                    option_id = option["id"]
-
-                    try:
-                        if len(option["parameters"]) == 0:
-                            break
-                        else:
-                            for param in option["parameters"]:
-                                if param["active"] == True:
-                                    option_data = param["data"]
-                                    colour_hex = param["colours"]
-                    except KeyError:
-                        # Toggle or slider do not have a 'parameters' key
-                        pass
+                    param = option_param
 
         if not found_option:
             return [None, None, None]
 
-        if not param:
-            colour_hex = found_option["colours"]
+        if param:
+            return [found_option["id"], param["data"], param["colours"]]
+
+        # Effect has parameters, but none are active
+        if found_option.get("parameters"):
+            return [found_option["id"], None, []]
+
+        return [found_option["id"], None, found_option["colours"]]
+
+    @staticmethod
+    def _find_active_effect(options):
+        """
+        Return the first active effect from a zone's list of options, and its
+        active parameter, if it has any.
+
+        Params:
+            options         (list)      Options for a zone from middleman.get_device()
 
-        return [option_id, option_data, colour_hex]
+        Returns tuple:
+        (option, param)     Either is None if not found.
+        """
+        for option in options:
+            if "active" not in option or option["type"] != "effect":
+                continue
+
+            if not option["active"]:
+                continue
+
+            # Toggle or slider do not have a 'parameters' key
+            parameters = option.get("parameters")
+            if parameters:
+                for param in parameters:
+                    if param["active"]:
+                        return (option, param)
+
+            return (option, None)
+
+        return (None, None)
 
     def replay_active_effect(self, backend, uid, zone):
         """
@@ -369,38 +489,30 @@ class Middleman(object):
         """
         self._dbg.stdout("Setting all devices to '{0}' (parameter: {1})".format(option_id, option_data), self._dbg.action, 1)
 
-        devices = self.get_device_all()
-        for device in devices:
-            name = device["name"]
-            backend = device["backend"]
-            uid = device["uid"]
-            serial = device["serial"]
-            colour_hex = []
-
-            for zone in device["zone_options"].keys():
-                # Skip if the device's zone/options doesn't support this request
-                skip = True
-                for option in device["zone_options"][zone]:
-                    if option["id"] == option_id:
-                        skip = False
-                        colour_hex = option["colours"]
-                        break
-
-                if skip:
-                    continue
-
-                # TODO: Use default colours
-                while len(colour_hex) < colours_needed:
-                    colour_hex.append("#00FF00")
-
-                self._dbg.stdout("- {0} [{1}]".format(name, zone), self._dbg.action, 1)
-                result = self.set_device_state(backend, uid, serial, zone, option_id, option_data, colour_hex)
-                if result == True:
-                    self._dbg.stdout("Request OK", self._dbg.success, 1)
-                elif result == False:
-                    self._dbg.stdout("Bad request!", self._dbg.error, 1)
-                else:
-                    self._dbg.stdout("Error: " + str(result), self._dbg.error, 1)
+        # Only keep the device's zones that support this request
+        targets = []
+        for device in self.get_device_all():
+            for zone, options in device["zone_options"].items():
+                option = next((option for option in options if option["id"] == option_id), None)
+                if option:
+                    targets.append((device, zone, option))
+
+        for device, zone, option in targets:
+            colour_hex = list(option["colours"])
+
+            # TODO: Use default colours
+            missing = colours_needed - len(colour_hex)
+            if missing > 0:
+                colour_hex.extend(["#00FF00"] * missing)
+
+            self._dbg.stdout("- {0} [{1}]".format(device["name"], zone), self._dbg.action, 1)
+            result = self.set_device_state(device["backend"], device["uid"], device["serial"], zone, option_id, option_data, colour_hex)
+            if result == True:
+                self._dbg.stdout("Request OK", self._dbg.success, 1)
+            elif result == False:
+                self._dbg.stdout("Bad request!", self._dbg.error, 1)
+            else:
+                self._dbg.stdout("Error: " + str(result), self._dbg.error, 1)
 
     def set_bulk_colour(self, new_colour_hex):
         """
@@ -415,38 +527,24 @@ class Middleman(object):
         """
         self._dbg.stdout("Setting all primary colours to {0}".format(new_colour_hex), self._dbg.action, 1)
 
-        devices = self.get_device_all()
-        for device in devices:
-            option_id, option_data, colour_hex = self._get_current_device_option(device)
-            name = device["name"]
-            backend = device["backend"]
-            uid = device["uid"]
-            serial = device["serial"]
-
-            # Skip devices that do not support this option
+        # Only keep the zones that support the device's current effect
+        targets = []
+        for device in self.get_device_all():
+            option_id = self._get_current_device_option(device)[0]
             if not option_id:
                 continue
 
-            for zone in device["zone_options"].keys():
-                # Skip if the device's zone/options doesn't support this request
-                skip = True
-                for option in device["zone_options"][zone]:
-                    if option["id"] == option_id:
-                        skip = False
-                        break
-
-                    if not option["colours"]:
-                        continue
-
-                if skip:
-                    continue
-
-                self._dbg.stdout("- {0} [{1}]".format(name, zone), self._dbg.action, 1)
-                result = self.set_device_colour(device, zone, new_colour_hex)
-                if result == True:
-                    self._dbg.stdout("Request OK", self._dbg.success, 1)
-                elif result == False:
-                    self._dbg.stdout("Bad request!", self._dbg.error, 1)
-                else:
-                    self._dbg.stdout("Error: " + str(result), self._dbg.error, 1)
+            for zone, options in device["zone_options"].items():
+                if any(option["id"] == option_id for option in options):
+                    targets.append((device, zone))
+
+        for device, zone in targets:
+            self._dbg.stdout("- {0} [{1}]".format(device["name"], zone), self._dbg.action, 1)
+            result = self.set_device_colour(device, zone, new_colour_hex)
+            if result == True:
+                self._dbg.stdout("Request OK", self._dbg.success, 1)
+            elif result == False:
+                self._dbg.stdout("Bad request!", self._dbg.error, 1)
+            else:
+                self._dbg.stdout("Error: " + str(result), self._dbg.error, 1)
 
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+#
+# Working directory should be the repository root.
+#
+
+import pylib.common as common
+import pylib.middleman as middleman
+
+import unittest
+
+
+def dummy_device(uid, name, serial, form_factor):
+    return {
+        "backend": "dummy",
+        "uid": uid,
+        "name": name,
+        "serial": serial,
+        "form_factor": {"id": form_factor}
+    }
+
+
+class DummyBackend(object):
+    """
+    A backend that returns fixed data and counts how often it is queried.
+    """
+    def __init__(self, backend_id, devices):
+        self.backend_id = backend_id
+        self.version = "1.0.0"
+        self.devices = devices
+        self.calls = 0
+        self.serial_calls = 0
+
+    def get_device_list(self):
+        self.calls += 1
+        return self.devices
+
+    def get_unsupported_devices(self):
+        self.calls += 1
+        return []
+
+    def get_device_by_serial(self, serial):
+        self.serial_calls += 1
+        for device in self.devices:
+            if device["serial"] == serial:
+                return device
+
+    def get_device(self, uid):
+        # Device is no longer available
+        return None
+
+    def restart(self):
+        return True
+
+
+class TestMiddleman(unittest.TestCase):
+    """
+    Test the middleman layer against dummy backends.
+    """
+    @classmethod
+    def setUpClass(self):
+        pass
+
+    @classmethod
+    def tearDownClass(self):
+        pass
+
+    def setUp(self):
+        self.middleman = middleman.Middleman(common.Debugging(), common, lambda string: string)
+        self.backend = DummyBackend("dummy", [
+            dummy_device(0, "Dummy Keyboard", "DUMMY0001", "keyboard"),
+            dummy_device(1, "Dummy Mouse", "DUMMY0002", "mouse")
+        ])
+        self.middleman._add_backend(self.backend)
+
+    def tearDown(self):
+        pass
+
+    def test_versions_cached(self):
+        self.assertEqual(self.middleman.get_versions(), {"dummy": "1.0.0"}, "Could not get backend versions")
+        self.backend.version = "2.0.0"
+        self.assertEqual(self.middleman.get_versions(), {"dummy": "1.0.0"}, "Versions were not cached")
+
+    def test_versions_is_copy(self):
+        self.middleman.get_versions().clear()
+        self.assertEqual(self.middleman.get_versions(), {"dummy": "1.0.0"}, "Versions cache was modified by caller")
+
+    def test_versions_cleared_on_restart(self):
+        self.middleman.get_versions()
+        self.backend.version = "2.0.0"
+        self.middleman.restart("dummy")
+        self.assertEqual(self.middleman.get_versions(), {"dummy": "2.0.0"}, "Versions were not cleared on restart")
+
+    def test_device_list_cached(self):
+        self.assertEqual(len(self.middleman.get_device_list()), 2, "Could not get device list")
+        self.middleman.get_device_list()
+        self.assertEqual(self.backend.calls, 1, "Device list was not cached")
+
+    def test_device_list_reload(self):
+        self.middleman.get_device_list()
+        self.backend.devices.append(dummy_device(2, "Dummy Mouse Mat", "DUMMY0003", "mousemat"))
+        self.middleman.reload_device_cache()
+        self.assertEqual(len(self.middleman.get_device_list()), 3, "Device cache did not reload")
+
+    def test_device_list_is_copy(self):
+        self.middleman.get_device_list().clear()
+        self.assertEqual(len(self.middleman.get_device_list()), 2, "Device cache was modified by caller")
+
+    def test_filtered_device_list(self):
+        devices = self.middleman.get_filtered_device_list("mouse")
+        self.assertEqual([device["name"] for device in devices], ["Dummy Mouse"], "Could not filter device list")
+
+    def test_device_by_name(self):
+        self.assertEqual(self.middleman.get_device_by_name("Dummy Mouse")["serial"], "DUMMY0002", "Could not find device by name")
+
+    def test_device_by_name_not_cached(self):
+        self.middleman.get_device_list()
+        self.backend.devices.append(dummy_device(2, "Dummy Mouse Mat", "DUMMY0003", "mousemat"))
+        self.assertEqual(self.middleman.get_device_by_name("Dummy Mouse Mat")["uid"], 2, "Could not find device connected after caching")
+
+    def test_device_cache_cleared_on_restart(self):
+        self.middleman.get_device_list()
+        self.middleman.restart("dummy")
+        self.assertEqual(self.middleman.device_cache, [], "Device cache was not cleared on restart")
+        self.assertEqual(self.middleman._devices_by_name, {}, "Device indexes were not cleared on restart")
+
+    def test_device_by_serial_does_not_populate_cache(self):
+        self.assertEqual(self.middleman.get_device_by_serial("DUMMY0002")["name"], "Dummy Mouse", "Could not find device by serial")
+        self.assertEqual(self.backend.calls, 0, "Device list was queried for a serial lookup")
+
+    def test_device_by_serial_cached(self):
+        other_device = dummy_device(0, "Other Headset", "OTHER0001", "headset")
+        other_device["backend"] = "other"
+        self.middleman._add_backend(DummyBackend("other", [other_device]))
+        self.middleman.get_device_list()
+        self.assertEqual(self.middleman.get_device_by_serial("OTHER0001")["name"], "Other Headset", "Could not find device by serial")
+        self.assertEqual(self.backend.serial_calls, 0, "Backend not owning the device was asked for it")
+
+    def test_unsupported_devices_cached(self):
+        self.middleman.get_unsupported_devices()
+        self.middleman.get_unsupported_devices()
+        self.assertEqual(self.backend.calls, 1, "Unsupported devices were not cached")
+
+    def test_unsupported_devices_cleared_on_reload(self):
+        self.middleman.get_unsupported_devices()
+        self.middleman.reload_device_cache()
+        self.middleman.get_unsupported_devices()
+        # Unsupported devices, the reloaded device list, then unsupported devices again.
+        self.assertEqual(self.backend.calls, 3, "Unsupported devices were not cleared on reload")
+
+    def test_unsupported_devices_kept_on_name_lookup(self):
+        self.middleman.get_unsupported_devices()
+        self.middleman.get_device_by_name("Disconnected Device")
+        self.middleman.get_unsupported_devices()
+        # Unsupported devices, then the device list retried for the missing name.
+        self.assertEqual(self.backend.calls, 2, "Unsupported devices were cleared by a name lookup")
+
+    def test_unsupported_devices_cleared_on_restart(self):
+        self.middleman.get_unsupported_devices()
+        self.middleman.restart("dummy")
+        self.middleman.get_unsupported_devices()
+        self.assertEqual(self.backend.calls, 2, "Unsupported devices were not cleared on restart")
+
+    def test_current_option_ignores_other_zones(self):
+        device = {"zone_options": {
+            "main": [{"id": "breath", "type": "effect", "active": True, "colours": ["#FF0000"], "parameters": [
+                {"data": "dual", "active": True, "colours": ["#00FF00", "#0000FF"]}
+            ]}],
+            "logo": [{"id": "spectrum", "type": "effect", "active": True, "colours": [], "parameters": []}]
+        }}
+        result = self.middleman._get_current_device_option(device)
+        self.assertEqual(result, ["spectrum", None, []], "Option data leaked from another zone")
+
+    def test_current_option_without_active_parameter(self):
+        device = {"zone_options": {
+            "main": [{"id": "breath", "type": "effect", "active": True, "colours": ["#FF0000"], "parameters": [
+                {"data": "single", "active": False, "colours": ["#00FF00"]}
+            ]}]
+        }}
+        result = self.middleman._get_current_device_option(device, "main")
+        self.assertEqual(result, ["breath", None, []], "Expected no colours without an active parameter")
+
+    def test_get_device_unavailable(self):
+        self.assertIsNone(self.middleman.get_device("dummy", 0), "Unavailable device should return None")
+
+    def test_get_device_unknown_backend(self):
+        self.assertIsNone(self.middleman.get_device("unknown", 0), "Unknown backend should return None")
+
+if __name__ == '__main__':
+    unittest.main()